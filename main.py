@@ -1,11 +1,75 @@
+import io
+import json
 import streamlit as st
-from utils.data_processor import IndustryMapper
+import streamlit.components.v1 as components
+from utils.data_processor import get_mapper
 import pandas as pd
 
-# Initialize the IndustryMapper
-@st.cache_resource
-def get_mapper():
-    return IndustryMapper()
+# Cache derived metadata; the leading underscore keeps Streamlit from hashing the mapper
+@st.cache_data
+def _industries(_mapper):
+    return _mapper.get_available_industries()
+
+@st.cache_data
+def _stats(_mapper):
+    return _mapper.get_database_stats()
+
+def _to_csv_bytes(df: pd.DataFrame) -> bytes:
+    # Serialize in chunks straight into a bytes buffer to limit peak memory
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False, chunksize=1000)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=4)
+def _fundamentals(symbols: tuple) -> pd.DataFrame:
+    return get_mapper().get_fundamentals_data(list(symbols))
+
+@st.cache_data(max_entries=4)
+def _fundamentals_csv(symbols: tuple) -> bytes:
+    return _to_csv_bytes(_fundamentals(symbols))
+
+# Cache the clipboard widget; the text is embedded as a JSON string literal
+# and copied in the browser, so clicking it does not trigger a rerun
+@st.cache_data(max_entries=4)
+def _copy_html(text: str) -> str:
+    payload = json.dumps(text).replace("</", "<\\/")
+    return f"""
+    <button id="copy-button">📋 Copy to Clipboard</button>
+    <script>
+        const text = {payload};
+        const button = document.getElementById("copy-button");
+        button.addEventListener("click", () => {{
+            navigator.clipboard.writeText(text).then(() => {{
+                button.textContent = "✅ Copied to clipboard!";
+            }});
+        }});
+    </script>
+    """
+
+# Cache everything derived from the input so widget interactions reuse it
+@st.cache_data(max_entries=4)
+def _process(symbols_input: str):
+    mapper = get_mapper()
+    mapped_symbols, invalid_symbols = mapper.map_symbols(symbols_input)
+
+    # Create a DataFrame for better display, building each column directly
+    results_df = pd.DataFrame({
+        'Symbol': pd.Series(list(mapped_symbols), dtype='string[pyarrow]'),
+        'Industry': pd.Series(list(mapped_symbols.values()), dtype='category')
+    })
+
+    # Sort by industry frequency using group sizes, without a helper column
+    industry_counts = results_df.groupby('Industry', observed=True)['Industry'].transform('size')
+    results_df = results_df.iloc[(-industry_counts.to_numpy()).argsort(kind='stable')]
+
+    return results_df, mapped_symbols, invalid_symbols, _to_csv_bytes(results_df)
+
+# Cache both TradingView formats so toggling the copy format is a cache hit
+@st.cache_data(max_entries=4)
+def _formats(symbols_input: str):
+    mapper = get_mapper()
+    mapped_symbols = _process(symbols_input)[1]
+    return mapper.format_tv_output(mapped_symbols), mapper.format_flat_output(mapped_symbols)
 
 def main():
     st.set_page_config(
@@ -30,7 +94,7 @@ def main():
 
     try:
         mapper = get_mapper()
-        stats = mapper.get_database_stats()
+        stats = _stats(mapper)
 
         # Display database statistics
         st.info(
@@ -41,7 +105,7 @@ def main():
 
         # Display available industries
         with st.expander("🏢 Available Industry Categories"):
-            industries = mapper.get_available_industries()
+            industries = _industries(mapper)
             # Display in columns for better readability
             cols = st.columns(3)
             industries_per_col = len(industries) // 3 + 1
@@ -70,7 +134,7 @@ def main():
             return
 
         try:
-            mapped_symbols, invalid_symbols = mapper.map_symbols(symbols_input)
+            results_df, mapped_symbols, invalid_symbols, results_csv = _process(symbols_input)
             symbol_list = list(mapped_symbols.keys())
 
             # Display results in columns
@@ -79,17 +143,6 @@ def main():
             with col1:
                 st.subheader("Results")
                 if mapped_symbols:
-                    # Create a DataFrame for better display
-                    results_df = pd.DataFrame(
-                        list(mapped_symbols.items()),
-                        columns=['Symbol', 'Industry']
-                    )
-                    
-                    # Sort by industry frequency
-                    industry_counts = results_df['Industry'].value_counts()
-                    results_df['IndustryCount'] = results_df['Industry'].map(industry_counts)
-                    results_df = results_df.sort_values('IndustryCount', ascending=False)
-                    results_df = results_df.drop(columns=['IndustryCount'])
                     st.dataframe(
                         results_df,
                         hide_index=True,
@@ -97,10 +150,9 @@ def main():
                     )
                     
                     # Add download button for search results
-                    csv = results_df.to_csv(index=False)
                     st.download_button(
                         label="📥 Download Results",
-                        data=csv,
+                        data=results_csv,
                         file_name="symbol_industry_mapping.csv",
                         mime="text/csv"
                     )
@@ -120,28 +172,16 @@ def main():
                         horizontal=True
                     )
                     
-                    # Get formatted outputs based on the current selection
-                    categorized_output = mapper.format_tv_output(mapped_symbols)
-                    flat_output = mapper.format_flat_output(mapped_symbols)
-                    
+                    categorized_output, flat_output = _formats(symbols_input)
+
                     # Directly use the radio button value to determine output
                     selected_output = categorized_output if copy_format == "With industry categorization" else flat_output
                     
                     # Display the code directly for visibility
                     st.code(selected_output, language="text")
                     
-                    # Use a Streamlit button for copying instead of JavaScript
-                    if st.button("📋 Copy to Clipboard", key="copy_button"):
-                        # Using st.text_area and javascript to copy to clipboard
-                        st.markdown(
-                            f"""
-                            <script>
-                                navigator.clipboard.writeText(`{selected_output}`);
-                            </script>
-                            """, 
-                            unsafe_allow_html=True
-                        )
-                        st.success("Copied to clipboard!")
+                    # Copy button rendered in a component so the copy happens client-side
+                    components.html(_copy_html(selected_output), height=45)
                     
                     # Also provide the text in an expandable area that can be manually copied
                     with st.expander("Show full text for manual copy", expanded=False):
@@ -155,7 +195,7 @@ def main():
             # Display fundamentals if option is selected
             if show_fundamentals and mapped_symbols:
                 st.subheader("Fundamentals & Results Calendar")
-                fundamentals_df = mapper.get_fundamentals_data(symbol_list)
+                fundamentals_df = _fundamentals(tuple(symbol_list))
                 if not fundamentals_df.empty:
                     st.dataframe(
                         fundamentals_df,
@@ -163,10 +203,9 @@ def main():
                         use_container_width=True
                     )
                     # Add download button for fundamentals data
-                    csv = fundamentals_df.to_csv(index=False)
                     st.download_button(
                         label="📥 Download Fundamentals Data",
-                        data=csv,
+                        data=_fundamentals_csv(tuple(symbol_list)),
                         file_name="fundamentals_data.csv",
                         mime="text/csv"
                     )
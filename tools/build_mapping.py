@@ -0,0 +1,14 @@
+"""Prebuild the industry mapping snapshot loaded by IndustryMapper.
+
+Run from the project root: python -m tools.build_mapping
+"""
+from utils.data_processor import IndustryMapper, SNAPSHOT_PATH
+
+def main():
+    mapper = IndustryMapper(use_snapshot=False)
+    mapper.save_snapshot()
+    stats = mapper.get_database_stats()
+    print(f"Wrote {SNAPSHOT_PATH} with {stats['total_symbols']:,} symbols")
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,264 @@
+import os
+import pickle
+import sys
+import tempfile
 import pandas as pd
-from typing import List, Tuple, Dict
+import pyarrow as pa
+import pyarrow.parquet as pq
+from functools import cached_property, lru_cache
+from typing import BinaryIO, Callable, List, Tuple, Dict, Iterator, Optional
+from itertools import islice
 from collections import defaultdict
 
-class IndustryMapper:
+# Map every accepted separator (newlines, semicolons) onto a comma in one pass
+_SEP_TABLE = str.maketrans({'\n': ',', '\r': ',', ';': ','})
+
+MAX_SYMBOLS = 999
+# Generous per-symbol budget covering the "NSE:" prefix, separators and padding
+MAX_INPUT_CHARS = MAX_SYMBOLS * 32
+
+INDUSTRIES_CSV = 'attached_assets/Industry Analytics.csv'
+STOCKS_CSV = 'attached_assets/Basic RS Setup (4).csv'
+RESULTS_CSV = 'attached_assets/Results Calendar.csv'
+
+# Results calendar columns that are read, with their display names
+RESULTS_COLUMNS = {
+    'Stock Name': 'Symbol',
+    'Quarterly Results Date': 'Results Date',
+    'QoQ % Net Profit Latest': 'QoQ Net Profit %',
+    'QoQ % EPS Latest': 'QoQ EPS %',
+    'YoY% EPS Latest': 'YoY EPS %',
+    'QoQ % Sales Latest': 'QoQ Sales %',
+    'YoY % Sales Latest': 'YoY Sales %'
+}
+
+def _write_atomically(path: str, write: Callable[[BinaryIO], None]):
+    """Write path through a temporary file in the same directory, then swap it in.
+
+    Sessions run as threads of one process, so concurrent writers and readers
+    must never see a partially written file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+# Parquet metadata key recording the read options a snapshot was built with
+_READ_OPTIONS_KEY = b'csv_read_options'
+
+def _read_csv(path: str, **kwargs) -> pd.DataFrame:
+    """Read a CSV with the pyarrow engine through a Parquet snapshot stored next to it.
+
+    The snapshot is used when it is newer than the CSV and was written with the
+    same read options; otherwise the CSV is parsed and the snapshot rewritten.
+    Parsed frames are not kept here; the mapper holds only what it derives from them.
+    """
+    mtime = os.path.getmtime(path)
+    parquet_path = f"{path}.parquet"
+    read_options = repr(sorted(kwargs.items())).encode()
+
+    try:
+        if os.path.getmtime(parquet_path) >= mtime:
+            table = pq.read_table(parquet_path)
+            if (table.schema.metadata or {}).get(_READ_OPTIONS_KEY) == read_options:
+                # Reapply requested dtypes, e.g. string storage is not round-tripped
+                return table.to_pandas().astype(kwargs.get('dtype', {}))
+    except (OSError, pa.ArrowInvalid):
+        pass
+
+    df = pd.read_csv(path, engine='pyarrow', **kwargs)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = {**(table.schema.metadata or {}), _READ_OPTIONS_KEY: read_options}
+        table = table.replace_schema_metadata(metadata)
+        _write_atomically(parquet_path, lambda f: pq.write_table(table, f, compression='zstd'))
+    except OSError:
+        pass  # Read-only deployments simply keep parsing the CSV
+    return df
+
+# Prebuilt mapper state written by `python -m tools.build_mapping`
+SNAPSHOT_PATH = 'data/industry_mapping.pkl'
+
+class SymbolTrie:
+    """Character trie over the symbol database for prefix lookups."""
+
+    # Key marking the end of a symbol; never clashes with a single character
+    _END = ''
+
     def __init__(self):
-        """Initialize the mapper with the permanent backend database."""
-        try:
-            self.load_database()
-        except Exception as e:
-            raise Exception(f"Failed to load industry mapping database: {str(e)}")
+        self.root = {}
+
+    def insert(self, symbol: str, industry: str):
+        """Add a symbol and its industry to the trie."""
+        node = self.root
+        for char in symbol:
+            node = node.setdefault(char, {})
+        node[self._END] = industry
+
+    def iter_prefix(self, prefix: str) -> Iterator[Tuple[str, str]]:
+        """Yield (symbol, industry) pairs starting with prefix in sorted order."""
+        node = self.root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return
+
+        stack = [(prefix, node)]
+        while stack:
+            symbol, node = stack.pop()
+            if self._END in node:
+                yield symbol, node[self._END]
+            # Push children in reverse so they are visited alphabetically
+            for char in sorted(node, reverse=True):
+                if char != self._END:
+                    stack.append((symbol + char, node[char]))
+
+class IndustryMapper:
+    def __init__(self, use_snapshot: bool = True):
+        """Initialize the mapper; the backend database is loaded on first use."""
+        self._use_snapshot = use_snapshot
+
+    @cached_property
+    def _database(self) -> Dict[str, object]:
+        """Mapping state, restored from the snapshot when current or built from the CSVs."""
+        state = self.load_snapshot() if self._use_snapshot else None
+        return state if state is not None else self.load_database()
+
+    # The fields below read from _database, so CSV or snapshot IO happens only
+    # when one of them is first accessed
+    @cached_property
+    def available_industries(self) -> List[str]:
+        return self._database['available_industries']
+
+    @cached_property
+    def mapping_dict(self) -> Dict[str, str]:
+        return self._database['mapping_dict']
+
+    @cached_property
+    def trie(self) -> SymbolTrie:
+        return self._database['trie']
+
+    @cached_property
+    def _total_symbols(self) -> int:
+        return self._database['_total_symbols']
 
-    def load_database(self):
+    @cached_property
+    def _mapped_industries(self) -> int:
+        return self._database['_mapped_industries']
+
+    def load_database(self) -> Dict[str, object]:
         """Load the permanent industry mapping database."""
         try:
             # Load industry categories
-            industry_categories = pd.read_csv('attached_assets/Industry Analytics.csv', header=None)
-            self.available_industries = sorted(industry_categories[0].unique())
+            # The file's header row is read as a category too; the column is named
+            # explicitly because Parquet snapshots need string column names
+            industry_categories = _read_csv(INDUSTRIES_CSV, header=None, names=['Basic Industry'])
 
             # Load symbol mappings from the complete dataset
-            stock_data = pd.read_csv('attached_assets/Basic RS Setup (4).csv')
-            self.mapping_df = pd.DataFrame({
-                'symbol': stock_data['Stock Name'],
-                'industry': stock_data['Basic Industry']
-            })
-
-            # Validate industries in mapping against available categories
-            invalid_industries = set(self.mapping_df['industry']) - set(self.available_industries)
-            if invalid_industries:
-                raise ValueError(f"Invalid industries in mapping: {invalid_industries}")
-
-            self.mapping_dict = dict(zip(
-                self.mapping_df['symbol'].str.upper(),
-                self.mapping_df['industry']
-            ))
-        except FileNotFoundError:
-            raise Exception("Industry mapping database not found")
-        except Exception as e:
-            raise Exception(f"Error reading industry database: {str(e)}")
+            # The multithreaded pyarrow reader parses only the two needed
+            # columns straight into compact dtypes
+            stock_data = _read_csv(
+                STOCKS_CSV,
+                usecols=['Stock Name', 'Basic Industry'],
+                dtype={'Stock Name': 'string[pyarrow]', 'Basic Industry': 'category'}
+            )
+        except FileNotFoundError as e:
+            raise Exception("Industry mapping database not found") from e
+
+        available_industries = sorted(industry_categories['Basic Industry'].unique().tolist())
+        symbol_column = stock_data['Stock Name']
+        industry_column = stock_data['Basic Industry']
+
+        # Validate industries in mapping against available categories; only the
+        # unique values are checked, against a frozenset built once
+        industries_set = frozenset(available_industries)
+        invalid_industries = [
+            industry for industry in industry_column.cat.categories.tolist()
+            if industry not in industries_set
+        ]
+        if invalid_industries:
+            raise ValueError(f"Invalid industries in mapping: {set(invalid_industries)}")
+
+        # Intern the industry names so every mapping entry points at one
+        # shared string per industry
+        industry_pool = {
+            industry: sys.intern(industry)
+            for industry in industry_column.cat.categories.tolist()
+        }
+
+        # Work on native lists; str.upper in a comprehension beats the .str accessor
+        symbols = [symbol.upper() for symbol in symbol_column.tolist()]
+        industries = [industry_pool[industry] for industry in industry_column.tolist()]
+        mapping_dict = dict(zip(symbols, industries))
+
+        # Build a trie for prefix lookups (e.g. autocomplete)
+        trie = SymbolTrie()
+        for symbol, industry in mapping_dict.items():
+            trie.insert(symbol, industry)
+
+        # Keep only the dict, its lookup structures and precomputed stats;
+        # the frame is not retained
+        return {
+            'available_industries': available_industries,
+            'mapping_dict': mapping_dict,
+            'trie': trie,
+            '_total_symbols': len(stock_data),
+            '_mapped_industries': industry_column.nunique()
+        }
+
+    def load_snapshot(self, path: str = SNAPSHOT_PATH) -> Optional[Dict[str, object]]:
+        """Read prebuilt state from the pickle snapshot if it is newer than its sources."""
+        try:
+            snapshot_mtime = os.path.getmtime(path)
+            # This module is a source too: code changes can alter the pickled state
+            sources = (INDUSTRIES_CSV, STOCKS_CSV, __file__)
+            if any(os.path.getmtime(source) > snapshot_mtime for source in sources):
+                return None
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def save_snapshot(self, path: str = SNAPSHOT_PATH):
+        """Write the loaded state to a pickle snapshot for fast cold starts."""
+        _write_atomically(path, lambda f: pickle.dump(self._database, f, protocol=5))
 
     def clean_symbols(self, symbols: str) -> List[str]:
         """Clean and validate input symbols."""
-        # Split and clean symbols
-        symbols = symbols.replace('\n', ',').replace(';', ',')
-        
-        # Process symbols, removing any "NSE:" prefix if present
-        symbol_list = []
-        for s in symbols.split(','):
-            if s.strip():
-                # Remove NSE: prefix if present
-                clean_symbol = s.strip().upper()
-                if clean_symbol.startswith("NSE:"):
-                    clean_symbol = clean_symbol[4:]
-                symbol_list.append(clean_symbol)
-
-        # Remove duplicates while preserving order
-        seen = set()
-        symbol_list = [x for x in symbol_list if not (x in seen or seen.add(x))]
-
-        return symbol_list
+        # Normalize all separators in a single pass, then split and clean
+        cleaned = [part.strip().upper() for part in symbols.translate(_SEP_TABLE).split(',')]
+
+        # Remove any "NSE:" prefix and duplicates while preserving order
+        return list(dict.fromkeys([symbol.removeprefix("NSE:") for symbol in cleaned if symbol]))
 
     def map_symbols(self, symbols: str) -> Tuple[Dict[str, str], List[str]]:
         """Map symbols to industries and return mapping and invalid symbols."""
-        clean_symbol_list = self.clean_symbols(symbols)
+        # Reject oversized pastes before doing any cleaning work
+        if len(symbols) > MAX_INPUT_CHARS:
+            raise ValueError(f"Input too large; maximum {MAX_SYMBOLS} symbols allowed per batch")
 
-        if len(clean_symbol_list) > 999:
-            raise ValueError("Maximum 999 symbols allowed per batch")
+        clean_symbol_list = self.clean_symbols(symbols)
 
-        mapped_symbols = {}
-        invalid_symbols = []
+        if len(clean_symbol_list) > MAX_SYMBOLS:
+            raise ValueError(f"Maximum {MAX_SYMBOLS} symbols allowed per batch")
 
-        for symbol in clean_symbol_list:
-            if symbol in self.mapping_dict:
-                mapped_symbols[symbol] = self.mapping_dict[symbol]
-            else:
-                invalid_symbols.append(symbol)
+        # Probe the mapping dict directly; at these batch sizes this beats
+        # handing the batch to pandas or Arrow
+        mapping_dict = self.mapping_dict
+        mapped_symbols = {symbol: mapping_dict[symbol] for symbol in clean_symbol_list if symbol in mapping_dict}
+        invalid_symbols = [symbol for symbol in clean_symbol_list if symbol not in mapping_dict]
 
         return mapped_symbols, invalid_symbols
 
+    def prefix_suggest(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Suggest up to limit (symbol, industry) pairs whose symbol starts with query."""
+        prefix = query.strip().upper().removeprefix("NSE:")
+        return list(islice(self.trie.iter_prefix(prefix), limit))
+
     def format_tv_output(self, mapped_symbols: Dict[str, str]) -> str:
         """Format the output in TradingView compatible format with industry grouping."""
         # Group symbols by industry
@@ -84,17 +266,16 @@ class IndustryMapper:
         for symbol, industry in mapped_symbols.items():
             industry_groups[industry].append(symbol)
 
-        # Format output with industry grouping
-        # Sort industries by number of symbols in descending order
-        formatted_lines = []
+        # Emit the groups largest first; the "NSE:" prefix is folded into the join
+        # separator, so no per-symbol strings are allocated, and all pieces go
+        # into one final join
+        parts = []
         sorted_industries = sorted(industry_groups.items(), key=lambda x: len(x[1]), reverse=True)
         for industry, symbols in sorted_industries:
-            symbol_count = len(symbols)
-            nse_symbols = [f"NSE:{symbol}" for symbol in sorted(symbols)]
-            formatted_line = f"###{industry}({symbol_count}),{','.join(nse_symbols)}"
-            formatted_lines.append(formatted_line)
-
-        return ",".join(formatted_lines)
+            if parts:
+                parts.append(',')
+            parts.extend(('###', industry, '(', str(len(symbols)), '),NSE:', ',NSE:'.join(sorted(symbols))))
+        return ''.join(parts)
         
     def format_flat_output(self, mapped_symbols: Dict[str, str]) -> str:
         """Format the output as a flat list of symbols without industry grouping."""
@@ -106,51 +287,62 @@ class IndustryMapper:
         """Get list of all available industries in the database."""
         return self.available_industries
 
+    @cached_property
+    def _results_df(self) -> pd.DataFrame:
+        """Results calendar with display column names, indexed by uppercased symbol."""
+        # usecols is pushed down into the pyarrow reader, so other columns are never parsed.
+        # Columns are renamed here once instead of on every query.
+        results_df = _read_csv(
+            RESULTS_CSV,
+            usecols=list(RESULTS_COLUMNS),
+            dtype={'Stock Name': 'string[pyarrow]'}
+        ).rename(columns=RESULTS_COLUMNS)
+        # On an Arrow-backed column .str.upper() runs pyarrow.compute.utf8_upper
+        symbols = results_df['Symbol'].str.upper()
+
+        # Format the DD/MM/YYYY dates once here rather than on every query
+        results_dates = pd.to_datetime(
+            results_df['Results Date'], format='%d/%m/%Y', errors='coerce', cache=True
+        ).dt.strftime('%d %b %Y')
+
+        return (
+            results_df.assign(**{'Results Date': results_dates})
+            .drop(columns='Symbol')
+            .set_index(symbols)
+        )
+
     def get_fundamentals_data(self, symbols: List[str]) -> pd.DataFrame:
         """Get fundamentals data for the given symbols."""
-        try:
-            # Load results calendar data
-            results_df = pd.read_csv('attached_assets/Results Calendar.csv')
-            
-            # Convert all symbols to uppercase
-            results_df['Stock Name'] = results_df['Stock Name'].str.upper()
-            symbols = [symbol.upper() for symbol in symbols]
-            
-            # Filter for the requested symbols
-            filtered_df = results_df[results_df['Stock Name'].isin(symbols)]
-            
-            if filtered_df.empty:
-                return pd.DataFrame()
-            
-            # Rename columns for better readability
-            column_mapping = {
-                'Stock Name': 'Symbol',
-                'Quarterly Results Date': 'Results Date',
-                'QoQ % Net Profit Latest': 'QoQ Net Profit %',
-                'QoQ % EPS Latest': 'QoQ EPS %',
-                'YoY% EPS Latest': 'YoY EPS %',
-                'QoQ % Sales Latest': 'QoQ Sales %',
-                'YoY % Sales Latest': 'YoY Sales %'
-            }
-            
-            filtered_df = filtered_df.rename(columns=column_mapping)
-            
-            # Convert date format if needed (DD/MM/YYYY to more readable format)
-            try:
-                filtered_df['Results Date'] = pd.to_datetime(filtered_df['Results Date'], format='%d/%m/%Y')
-                filtered_df['Results Date'] = filtered_df['Results Date'].dt.strftime('%d %b %Y')
-            except:
-                pass  # Keep original format if conversion fails
-                
-            return filtered_df
-        except Exception as e:
-            print(f"Error fetching fundamentals data: {str(e)}")
+        # Convert all symbols to uppercase, dropping repeats
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+        # Look up the requested symbols on the prebuilt hash index; this is
+        # O(len(symbols)) instead of a scan over the whole calendar
+        positions = self._results_df.index.get_indexer_for(symbols)
+        matched = positions[positions >= 0]
+        matched.sort()  # keep the calendar's own row order
+        filtered_df = self._results_df.take(matched).reset_index()
+
+        if filtered_df.empty:
             return pd.DataFrame()
 
+        return filtered_df
+
     def get_database_stats(self) -> Dict[str, int]:
         """Get statistics about the mapping database."""
         return {
-            'total_symbols': len(self.mapping_df),
+            'total_symbols': self._total_symbols,
             'total_industries': len(self.available_industries),
-            'mapped_industries': len(self.mapping_df['industry'].unique())
-        }
\ No newline at end of file
+            'mapped_industries': self._mapped_industries
+        }
+
+# Process-wide mapper shared by every session. It lives in this imported module
+# rather than main.py, which Streamlit re-executes on every rerun.
+@lru_cache(maxsize=1)
+def get_mapper() -> IndustryMapper:
+    """Return the shared IndustryMapper.
+
+    Callers should use this instead of constructing IndustryMapper directly so
+    the database is loaded and cached only once per process.
+    """
+    return IndustryMapper()